@@ -91,9 +91,28 @@ def parse_ui_metadata_for_file(full_content):
 
 
 # --- Individual Policy Check Parsing Functions (Unchanged) ---
+_KEY_VALUE_RE = re.compile(
+    r"^\s*([^\s:]+)\s*:\s*(.*?)(?=\n\s*[^\s:]+\s*:|\Z)", re.DOTALL | re.MULTILINE
+)
+_CUSTOM_ITEM_RE = re.compile(r"<custom_item>(.*?)</custom_item>", re.DOTALL)
+_CONDITION_RE = re.compile(r"<condition(.*?)>(.*?)</condition>", re.DOTALL)
+_THEN_RE = re.compile(r"<then>(.*?)</then>", re.DOTALL)
+_REPORT_RE = re.compile(r"<report(.*?)>(.*?)</report>", re.DOTALL)
+_ATTR_RE = re.compile(r'(\w+)\s*:\s*"?([^"]*)"?')
+# A well-formed <if> block: condition, then the report wrapped in <then>.
+_IF_STRUCT_RE = re.compile(
+    r"<if>\s*<condition(?P<cattrs>[^>]*)>(?P<cbody>.*?)</condition>\s*<then>\s*"
+    r"<report(?P<rattrs>[^>]*)>(?P<rbody>.*?)</report>\s*</then>",
+    re.DOTALL,
+)
+# Condition attributes whose lower-cased key is stored under a different name.
+_ATTR_RENAME = {"auto": "auto_status"}
+
+
 def extract_middle_content(file_path):
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
+        # A 1 MiB buffer keeps the read() syscall count low on multi-MB audits.
+        with open(file_path, "r", encoding="utf-8", buffering=1 << 20) as f:
             content = f.read()
         start_marker_end_tag = "</report>"
         end_marker_start_tag = "</then>"
@@ -105,7 +124,7 @@ def extract_middle_content(file_path):
         if end_part_start_pos == -1:
             return None
         return content[start_part_end_pos:end_part_start_pos]
-    except (FileNotFoundError, Exception):
+    except (OSError, UnicodeDecodeError):
         return None
 
 
@@ -118,65 +137,78 @@ def extract_policy_blocks(content):
     return [block.strip() for block in blocks if block.strip()]
 
 
-def clean_value(value):
+_CLEAN_MAP = {"YES": True, "NO": False}
+
+
+def clean_value(value, _lookup=_CLEAN_MAP.get):
     cleaned = value.strip()
-    if cleaned.startswith('"') and cleaned.endswith('"'):
+    # Slices rather than indexing so "" and a lone '"' behave as before.
+    if cleaned[:1] == '"' == cleaned[-1:]:
         cleaned = cleaned[1:-1]
-    if cleaned == "YES":
-        return True
-    if cleaned == "NO":
-        return False
-    return cleaned
+    flag = _lookup(cleaned)
+    return cleaned if flag is None else flag
 
 
 def parse_key_value_block(text):
     data = OrderedDict()
-    pattern = re.compile(
-        r"^\s*([^\s:]+)\s*:\s*(.*?)(?=\n\s*[^\s:]+\s*:|\Z)", re.DOTALL | re.MULTILINE
-    )
-    matches = pattern.findall(text)
+    matches = _KEY_VALUE_RE.findall(text)
     for key, value in matches:
         data[key.strip()] = clean_value(value)
     return data
 
 
 def parse_custom_item(block_text):
-    inner_content_match = re.search(
-        r"<custom_item>(.*?)</custom_item>", block_text, re.DOTALL
-    )
+    inner_content_match = _CUSTOM_ITEM_RE.search(block_text)
     if not inner_content_match:
         return {}
     return parse_key_value_block(inner_content_match.group(1))
 
 
+def parse_condition(attrs, content):
+    data = OrderedDict()
+    for key, value in _ATTR_RE.findall(attrs):
+        key = key.lower()
+        data[_ATTR_RENAME.get(key, key)] = value
+    data["rules"] = [
+        parse_key_value_block(rule.group(1))
+        for rule in _CUSTOM_ITEM_RE.finditer(content)
+    ]
+    return data
+
+
+def parse_report(attrs, content):
+    data = parse_key_value_block(content)
+    for key, value in _ATTR_RE.findall(attrs):
+        data[key.lower()] = value
+    return data
+
+
 def parse_if_block(block_text):
     result = {"check_type": "CONDITIONAL"}
-    condition_match = re.search(
-        r"<condition(.*?)>(.*?)</condition>", block_text, re.DOTALL
-    )
-    if condition_match:
-        attrs, content = condition_match.groups()
-        data = OrderedDict()
-        attr_matches = re.findall(r'(\w+)\s*:\s*"?([^"]*)"?', attrs)
-        for key, value in attr_matches:
-            data[f"{key.lower()}_status" if key.lower() == "auto" else key.lower()] = (
-                value
+    # Fast path: one search picks up all four pieces of a well-formed block.
+    struct_match = _IF_STRUCT_RE.match(block_text)
+    if (
+        struct_match
+        and "</condition>" not in struct_match.group("cbody")
+        and "</report>" not in struct_match.group("rbody")
+    ):
+        result["condition"] = parse_condition(
+            struct_match.group("cattrs"), struct_match.group("cbody")
+        )
+        result["then"] = {
+            "report": parse_report(
+                struct_match.group("rattrs"), struct_match.group("rbody")
             )
-        rules = re.findall(r"<custom_item>.*?</custom_item>", content, re.DOTALL)
-        data["rules"] = [parse_custom_item(rule) for rule in rules]
-        result["condition"] = data
-    then_match = re.search(r"<then>(.*?)</then>", block_text, re.DOTALL)
+        }
+        return result
+    condition_match = _CONDITION_RE.search(block_text)
+    if condition_match:
+        result["condition"] = parse_condition(*condition_match.groups())
+    then_match = _THEN_RE.search(block_text)
     if then_match:
-        report_match = re.search(
-            r"<report(.*?)>(.*?)</report>", then_match.group(1), re.DOTALL
-        )
+        report_match = _REPORT_RE.search(then_match.group(1))
         if report_match:
-            attrs, content = report_match.groups()
-            data = parse_key_value_block(content)
-            attr_matches = re.findall(r'(\w+)\s*:\s*"?([^"]*)"?', attrs)
-            for key, value in attr_matches:
-                data[key.lower()] = value
-            result["then"] = {"report": data}
+            result["then"] = {"report": parse_report(*report_match.groups())}
     return result
 
 
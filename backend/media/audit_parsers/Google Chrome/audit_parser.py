@@ -4,6 +4,7 @@ import re
 import json
 import os
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Metadata Parsing Functions ---
 def parse_tag_content(tag_name, text):
@@ -87,9 +88,28 @@ def parse_ui_metadata_for_file(full_content):
 
 
 # --- Individual Policy Check Parsing Functions ---
+_KEY_VALUE_RE = re.compile(
+    r"^\s*([^\s:]+)\s*:\s*(.*?)(?=\n\s*[^\s:]+\s*:|\Z)", re.DOTALL | re.MULTILINE
+)
+_CUSTOM_ITEM_RE = re.compile(r"<custom_item>(.*?)</custom_item>", re.DOTALL)
+_CONDITION_RE = re.compile(r"<condition(.*?)>(.*?)</condition>", re.DOTALL)
+_THEN_RE = re.compile(r"<then>(.*?)</then>", re.DOTALL)
+_REPORT_RE = re.compile(r"<report(.*?)>(.*?)</report>", re.DOTALL)
+_ATTR_RE = re.compile(r'(\w+)\s*:\s*"?([^"]*)"?')
+# A well-formed <if> block: condition, then the report wrapped in <then>.
+_IF_STRUCT_RE = re.compile(
+    r"<if>\s*<condition(?P<cattrs>[^>]*)>(?P<cbody>.*?)</condition>\s*<then>\s*"
+    r"<report(?P<rattrs>[^>]*)>(?P<rbody>.*?)</report>\s*</then>",
+    re.DOTALL,
+)
+# Condition attributes whose lower-cased key is stored under a different name.
+_ATTR_RENAME = {"auto": "auto_status"}
+
+
 def extract_middle_content(file_path):
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
+        # A 1 MiB buffer keeps the read() syscall count low on multi-MB audits.
+        with open(file_path, "r", encoding="utf-8", buffering=1 << 20) as f:
             content = f.read()
         start_marker_end_tag = "</report>"
         end_marker_start_tag = "</then>"
@@ -101,7 +121,7 @@ def extract_middle_content(file_path):
         if end_part_start_pos == -1:
             return None
         return content[start_part_end_pos:end_part_start_pos]
-    except (FileNotFoundError, Exception):
+    except (OSError, UnicodeDecodeError):
         return None
 
 
@@ -114,65 +134,78 @@ def extract_policy_blocks(content):
     return [block.strip() for block in blocks if block.strip()]
 
 
-def clean_value(value):
+_CLEAN_MAP = {"YES": True, "NO": False}
+
+
+def clean_value(value, _lookup=_CLEAN_MAP.get):
     cleaned = value.strip()
-    if cleaned.startswith('"') and cleaned.endswith('"'):
+    # Slices rather than indexing so "" and a lone '"' behave as before.
+    if cleaned[:1] == '"' == cleaned[-1:]:
         cleaned = cleaned[1:-1]
-    if cleaned == "YES":
-        return True
-    if cleaned == "NO":
-        return False
-    return cleaned
+    flag = _lookup(cleaned)
+    return cleaned if flag is None else flag
 
 
 def parse_key_value_block(text):
     data = OrderedDict()
-    pattern = re.compile(
-        r"^\s*([^\s:]+)\s*:\s*(.*?)(?=\n\s*[^\s:]+\s*:|\Z)", re.DOTALL | re.MULTILINE
-    )
-    matches = pattern.findall(text)
+    matches = _KEY_VALUE_RE.findall(text)
     for key, value in matches:
         data[key.strip()] = clean_value(value)
     return data
 
 
 def parse_custom_item(block_text):
-    inner_content_match = re.search(
-        r"<custom_item>(.*?)</custom_item>", block_text, re.DOTALL
-    )
+    inner_content_match = _CUSTOM_ITEM_RE.search(block_text)
     if not inner_content_match:
         return {}
     return parse_key_value_block(inner_content_match.group(1))
 
 
+def parse_condition(attrs, content):
+    data = OrderedDict()
+    for key, value in _ATTR_RE.findall(attrs):
+        key = key.lower()
+        data[_ATTR_RENAME.get(key, key)] = value
+    data["rules"] = [
+        parse_key_value_block(rule.group(1))
+        for rule in _CUSTOM_ITEM_RE.finditer(content)
+    ]
+    return data
+
+
+def parse_report(attrs, content):
+    data = parse_key_value_block(content)
+    for key, value in _ATTR_RE.findall(attrs):
+        data[key.lower()] = value
+    return data
+
+
 def parse_if_block(block_text):
     result = {"check_type": "CONDITIONAL"}
-    condition_match = re.search(
-        r"<condition(.*?)>(.*?)</condition>", block_text, re.DOTALL
-    )
-    if condition_match:
-        attrs, content = condition_match.groups()
-        data = OrderedDict()
-        attr_matches = re.findall(r'(\w+)\s*:\s*"?([^"]*)"?', attrs)
-        for key, value in attr_matches:
-            data[f"{key.lower()}_status" if key.lower() == "auto" else key.lower()] = (
-                value
+    # Fast path: one search picks up all four pieces of a well-formed block.
+    struct_match = _IF_STRUCT_RE.match(block_text)
+    if (
+        struct_match
+        and "</condition>" not in struct_match.group("cbody")
+        and "</report>" not in struct_match.group("rbody")
+    ):
+        result["condition"] = parse_condition(
+            struct_match.group("cattrs"), struct_match.group("cbody")
+        )
+        result["then"] = {
+            "report": parse_report(
+                struct_match.group("rattrs"), struct_match.group("rbody")
             )
-        rules = re.findall(r"<custom_item>.*?</custom_item>", content, re.DOTALL)
-        data["rules"] = [parse_custom_item(rule) for rule in rules]
-        result["condition"] = data
-    then_match = re.search(r"<then>(.*?)</then>", block_text, re.DOTALL)
+        }
+        return result
+    condition_match = _CONDITION_RE.search(block_text)
+    if condition_match:
+        result["condition"] = parse_condition(*condition_match.groups())
+    then_match = _THEN_RE.search(block_text)
     if then_match:
-        report_match = re.search(
-            r"<report(.*?)>(.*?)</report>", then_match.group(1), re.DOTALL
-        )
+        report_match = _REPORT_RE.search(then_match.group(1))
         if report_match:
-            attrs, content = report_match.groups()
-            data = parse_key_value_block(content)
-            attr_matches = re.findall(r'(\w+)\s*:\s*"?([^"]*)"?', attrs)
-            for key, value in attr_matches:
-                data[key.lower()] = value
-            result["then"] = {"report": data}
+            result["then"] = {"report": parse_report(*report_match.groups())}
     return result
 
 
@@ -203,8 +236,8 @@ def get_base_filename_from_block(block):
     return None
 
 
-def process_policy_checks(input_file, output_folder):
-    """Processes the middle of the audit file to create individual policy JSONs."""
+def collect_policy_checks(input_file, output_folder, outputs):
+    """Parses the middle of the audit file into individual policy JSON payloads."""
     middle_content = extract_middle_content(input_file)
     if not middle_content:
         return
@@ -219,11 +252,33 @@ def process_policy_checks(input_file, output_folder):
         if base_filename:
             output_filename = f"{base_filename}.json"
             output_path = os.path.join(output_folder, output_filename)
-            try:
-                with open(output_path, "w", encoding="utf-8") as f:
-                    json.dump(parsed_data, f, indent=2)
-            except IOError:
-                continue
+            # Keyed by path so a repeated policy number keeps the last block, as before.
+            outputs[output_path] = to_json_bytes(parsed_data)
+
+
+# --- Output Writing Functions ---
+def to_json_bytes(data):
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+def write_bytes(path, payload):
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(path, flags, 0o666)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def write_outputs(outputs):
+    """Writes all collected (path -> payload) files, overlapping their open/close latency."""
+    if not outputs:
+        return
+    with ThreadPoolExecutor(max_workers=min(16, len(outputs))) as executor:
+        # Consuming the results re-raises the first failed write.
+        list(executor.map(write_bytes, outputs.keys(), outputs.values()))
 
 # --- Main Processing Function ---
 def process_audit_file(input_file_path, base_output_folder):
@@ -243,6 +298,9 @@ def process_audit_file(input_file_path, base_output_folder):
         output_folder_path = os.path.join(base_output_folder, output_folder_name)
         os.makedirs(output_folder_path, exist_ok=True)
 
+        # Every output is parsed first and written in one batch at the end.
+        outputs = OrderedDict()
+
         # --- 1. Generate metadata.json ---
         with open(input_file_path, "r", encoding="utf-8") as f:
             content = f.read()
@@ -250,11 +308,10 @@ def process_audit_file(input_file_path, base_output_folder):
         metadata = parse_ui_metadata_for_file(content)
         if metadata:
             metadata_path = os.path.join(output_folder_path, "metadata.json")
-            with open(metadata_path, "w", encoding="utf-8") as f:
-                json.dump(metadata, f, indent=2)
+            outputs[metadata_path] = to_json_bytes(metadata)
         
         # --- 2. Generate individual policy JSONs ---
-        process_policy_checks(input_file_path, output_folder_path)
+        collect_policy_checks(input_file_path, output_folder_path, outputs)
         
         # --- 3. (NEW) Generate an empty commands/script.json ---
         commands_folder_path = os.path.join(output_folder_path, "commands")
@@ -264,9 +321,10 @@ def process_audit_file(input_file_path, base_output_folder):
         script_data = {}
 
         script_json_path = os.path.join(commands_folder_path, "script.json")
-        with open(script_json_path, "w", encoding="utf-8") as f:
-            # Write the empty JSON object to the file
-            json.dump(script_data, f, indent=2)
+        outputs[script_json_path] = to_json_bytes(script_data)
+
+        # --- 4. Write all generated files ---
+        write_outputs(outputs)
 
         return output_folder_path    
     except Exception as e:
@@ -1,146 +1,302 @@
+import fnmatch
+import io
 import os
+import re
+import threading
 import time
-from pathlib import Path
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from watchdog.events import PatternMatchingEventHandler
 
 
 # --- Configuration ---
 FOLDER_TO_WATCH = "frontend"
+# Written beside FOLDER_TO_WATCH, never inside it, so the watcher never sees its own output
 OUTPUT_FILENAME = "frontend.txt"
-# Time to wait after a change before regenerating to group multiple quick changes (e.g., save-all)
+# Quiet period after the last change before regenerating, so bursts (e.g., save-all) produce one report
 DEBOUNCE_SECONDS = 2.0
+# Directory names that are never walked or listed in the report
+EXCLUDE_DIRS = frozenset({'.git', '__pycache__', 'venv', '.venv', 'node_modules', '.vscode', 'build'})
+# Glob patterns excluded from the report, matched against both the bare name and
+# the path relative to the watched folder (e.g. '*.log', 'src/generated/*')
+EXCLUDE_PATTERNS = ['.DS_Store']
+# Cap on files opened by the walk but not yet consumed by a reader thread
+MAX_OPEN_FILES = 64
 
 
 # --- Report Generation Logic (from previous script) ---
 
 
-def generate_structure_string(root_path, indent="", exclude_dirs=None):
-    """Recursively generates a string representing the folder structure."""
-    if exclude_dirs is None:
-        exclude_dirs = {'.git', '__pycache__', 'venv', '.venv', 'node_modules', '.vscode', 'build'}
-    
-    lines = []
-    try:
-        # Sort items for consistent order
-        items = sorted(os.listdir(root_path))
-    except (FileNotFoundError, PermissionError):
-        return []
+def compile_exclude_patterns(patterns):
+    """Compiles glob patterns into a single regex, or None when there are none."""
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns))
+
+
+_EXCLUDE_RE = compile_exclude_patterns(EXCLUDE_PATTERNS)
 
 
-    for i, name in enumerate(items):
-        path = os.path.join(root_path, name)
-        is_last = i == (len(items) - 1)
+def push_tree_entries(stack, tree, dir_path, indent):
+    """Pushes a directory's entries in reverse so they pop off in sorted order."""
+    entries = tree.get(dir_path, [])
+    last_index = len(entries) - 1
+    for i in range(last_index, -1, -1):
+        name, is_dir = entries[i]
+        stack.append((dir_path, name, is_dir, indent, i == last_index))
+
+
+def generate_structure_string(tree, root_path):
+    """Renders the folder structure collected by the report walk, depth first."""
+    lines = []
+    _append = lines.append
+    _join = os.path.join
+    # An explicit stack instead of recursion: no frame per directory and no
+    # recursion limit on deeply nested trees
+    stack = deque()
+    push_tree_entries(stack, tree, root_path, "")
+    while stack:
+        parent, name, is_dir, indent, is_last = stack.pop()
         prefix = "└── " if is_last else "├── "
         
-        if os.path.isdir(path):
-            if name in exclude_dirs:
-                continue
-            lines.append(f"{indent}{prefix}{name}/")
+        if is_dir:
+            _append(f"{indent}{prefix}{name}/")
             child_indent = indent + ("    " if is_last else "│   ")
-            lines.extend(generate_structure_string(path, child_indent, exclude_dirs))
+            push_tree_entries(stack, tree, _join(parent, name), child_indent)
         else:
-            # Exclude the output file itself from the structure
-            if name == OUTPUT_FILENAME:
-                continue
-            lines.append(f"{indent}{prefix}{name}")
+            _append(f"{indent}{prefix}{name}")
             
     return lines
 
 
-def is_text_file(filepath):
-    """Heuristically checks if a file is text-based."""
+def walk_tree(root_path):
+    """
+    Yields (root, dirs, files, dir_fd) top-down. os.fwalk is used where available
+    so files can be stat'ed and opened relative to dir_fd instead of re-resolving
+    the full path each time; elsewhere (e.g. Windows) os.walk is used and dir_fd
+    is None.
+    """
+    if hasattr(os, 'fwalk'):
+        yield from os.fwalk(root_path, topdown=True)
+    else:
+        for root, dirs, files in os.walk(root_path, topdown=True):
+            yield root, dirs, files, None
+
+
+def read_file_content(fd, release_slot):
+    """
+    Reads an already-opened file into a string, or a placeholder for binaries,
+    then frees its open-file slot. The whole text is returned because the
+    report is written in walk order and the content is kept in the file cache.
+    """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            f.read(512)
-        return True
-    except (UnicodeDecodeError, AttributeError, IOError):
-        return False
+        with open(fd, 'rb', buffering=1 << 16) as raw:
+            # Sniff the already-buffered head for NUL bytes without consuming it
+            if b'\x00' in raw.peek(8192)[:8192]:
+                return "[Binary file, content not displayed]"
+            with io.TextIOWrapper(raw, encoding='utf-8', errors='ignore') as text:
+                return text.read()
+    finally:
+        release_slot()
+
 
+def generate_folder_report(root_path, output_file, cache=None, exclude_patterns=None):
+    """
+    Generates a detailed report of a folder's structure and file contents.
 
-def generate_folder_report(root_path, output_file):
-    """Generates a detailed report of a folder's structure and file contents."""
-    path_obj = Path(root_path)
-    if not path_obj.is_dir():
+    exclude_patterns overrides EXCLUDE_PATTERNS; excluded directories are
+    pruned from the walk rather than filtered afterwards.
+
+    If a cache dict is given, it maps each file to (mtime_ns, size, content)
+    from the previous run; unchanged files are not read again, and the dict
+    is refreshed in place so it only holds files from this run. Files are
+    read on a thread pool and written out in walk order.
+    """
+    if not os.path.isdir(root_path):
         print(f"❌ Error: The directory '{root_path}' does not exist.")
         return
 
-
     print(f"🔄 Regenerating report for '{root_path}'...")
     
-    exclude_dirs = {'.git', '__pycache__', 'venv', '.venv', 'node_modules', '.vscode', 'build'}
-    exclude_files = {'.DS_Store', output_file} # IMPORTANT: Exclude the output file
-    
-    report_parts = []
+    # Locals skip a global lookup on every directory of the walk
+    exclude_dirs = EXCLUDE_DIRS
+    if exclude_patterns is None:
+        exclude_re = _EXCLUDE_RE
+    else:
+        exclude_re = compile_exclude_patterns(exclude_patterns)
+    is_excluded = exclude_re.match if exclude_re is not None else None
     
-    # 1. Generate Directory Structure
-    report_parts.append("Directory structure:")
-    structure_lines = generate_structure_string(str(path_obj), exclude_dirs=exclude_dirs)
-    report_parts.extend(structure_lines)
-    report_parts.append("\n\nFiles Content:\n")
+    tree = {}
+    files_to_read = []
+    sep = os.sep
+    _join = os.path.join
+    previous_cache = {} if cache is None else cache
+    fresh_cache = {}
+    open_slots = threading.BoundedSemaphore(MAX_OPEN_FILES)
+    open_flags = os.O_RDONLY | getattr(os, 'O_BINARY', 0)
+    separator = "=" * 48
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        # 1. Walk the folder once, recording each directory's entries for the
+        #    structure. Changed files are opened relative to the directory fd
+        #    and handed to the thread pool, so the I/O-bound reads (which
+        #    release the GIL) overlap with the rest of the walk
+        for root, dirs, files, dir_fd in walk_tree(root_path):
+            # Plain strings per directory instead of a Path object per file
+            rel_root = os.path.relpath(root, root_path)
+            rel_prefix = "" if rel_root == "." else rel_root + sep
+            # This is the line that prunes the directories from the walk
+            dirs[:] = sorted(d for d in dirs if d not in exclude_dirs)
+            files.sort()
+            if is_excluded is not None:
+                # Patterns are written with '/', whatever the platform separator
+                match_prefix = rel_prefix.replace(sep, "/")
+                dirs[:] = [d for d in dirs if not (is_excluded(d) or is_excluded(match_prefix + d))]
+                files = [f for f in files if not (is_excluded(f) or is_excluded(match_prefix + f))]
+            # Sort items for consistent order
+            tree[root] = sorted([(d, True) for d in dirs] + [(f, False) for f in files])
 
+            for filename in files:
+                key = _join(root, filename)
+                target = filename if dir_fd is not None else key
+                try:
+                    st = os.stat(target, dir_fd=dir_fd)
+                    stamp = (st.st_mtime_ns, st.st_size)
+                    cached = previous_cache.get(key)
+                    if cached is not None and cached[:2] == stamp:
+                        content = cached[2]
+                    else:
+                        open_slots.acquire()
+                        try:
+                            fd = os.open(target, open_flags, dir_fd=dir_fd)
+                        except OSError:
+                            open_slots.release()
+                            raise
+                        content = executor.submit(read_file_content, fd, open_slots.release)
+                except OSError as e:
+                    stamp, content = None, f"[Could not read file: {e}]"
+                files_to_read.append((rel_prefix + filename, key, stamp, content))
 
-    # 2. Walk through and get file contents
-    for root, dirs, files in os.walk(root_path, topdown=True):
-        dirs[:] = [d for d in dirs if d not in exclude_dirs]
-        
-        for filename in sorted(files):
-            if filename in exclude_files:
-                continue
-            
-            file_path = Path(root) / filename
-            relative_path = file_path.relative_to(root_path)
-            separator = "=" * 48
-            report_parts.append(f"{separator}\nFILE: {relative_path}\n{separator}")
-            
-            try:
-                if is_text_file(file_path):
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                        report_parts.append(content)
-                else:
-                    report_parts.append("[Binary file, content not displayed]")
-            except Exception as e:
-                report_parts.append(f"[Could not read file: {e}]")
-            
-            report_parts.append("\n\n")
+        # 2. Stream the report straight to the output file, collecting the reads
+        #    in walk order so the report stays deterministic
+        try:
+            with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as out:
+                out.write("Directory structure:")
+                for line in generate_structure_string(tree, root_path):
+                    out.write("\n")
+                    out.write(line)
+                out.write("\n\n\nFiles Content:\n")
 
+                for relative_path, key, stamp, content in files_to_read:
+                    out.write(f"\n{separator}\nFILE: {relative_path}\n{separator}\n")
+                    if isinstance(content, Future):
+                        try:
+                            content = content.result()
+                        except Exception as e:
+                            stamp, content = None, f"[Could not read file: {e}]"
+                    if stamp is not None:
+                        fresh_cache[key] = (*stamp, content)
+                    out.write(content)
+                    out.write("\n\n\n")
+            if cache is not None:
+                cache.clear()
+                cache.update(fresh_cache)
+            print(f"✅ Report successfully updated in '{output_file}'")
+        except IOError as e:
+            print(f"❌ Error writing to file: {e}")
 
-    # 3. Write the report to the output file
-    try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("\n".join(report_parts))
-        print(f"✅ Report successfully updated in '{output_file}'")
-    except IOError as e:
-        print(f"❌ Error writing to file: {e}")
 
 
 
 # --- File System Watcher Logic ---
 
 
-class ReportEventHandler(FileSystemEventHandler):
+def is_inside(path, folder):
+    """True when path is folder itself or lies below it."""
+    folder = os.path.abspath(folder)
+    try:
+        return os.path.commonpath([os.path.abspath(path), folder]) == folder
+    except ValueError:
+        # Different drives on Windows: certainly outside
+        return False
+
+
+class ReportEventHandler(PatternMatchingEventHandler):
     """Handles file system events and triggers report generation."""
     def __init__(self, folder_path, output_filename):
+        super().__init__(ignore_patterns=EXCLUDE_PATTERNS, ignore_directories=False)
         self.folder_path = folder_path
         self.output_filename = output_filename
-        self.last_triggered = 0
+        # Debounce thread, alive only while waiting for events to go quiet
+        self._timer = None
+        self._deadline = 0.0
+        self._lock = threading.Lock()
+        # Serializes report runs so two timers never write the file at once
+        self._report_lock = threading.Lock()
+        # (mtime_ns, size, content) per file, kept across regenerations
+        self._cache = {}
+        # Changed paths seen since the last report, coalesced by path
+        self._pending = {}
+
+
+    def dispatch(self, event):
+        """
+        Drops events under excluded dirs (e.g. .git during a checkout) before
+        they reach watchdog's matcher; one set check per path, at any depth.
+        """
+        for path in (event.src_path, getattr(event, 'dest_path', '')):
+            if path and not EXCLUDE_DIRS.isdisjoint(os.path.relpath(path, self.folder_path).split(os.sep)):
+                return
+        super().dispatch(event)
 
 
     def on_any_event(self, event):
         """
         This method is called for any event (created, deleted, modified, moved).
         """
-        # Ignore events related to the output file itself to prevent loops
-        if event.src_path.endswith(self.output_filename):
+        # Trailing-edge debounce: every event pushes the deadline back, so the
+        # report is generated once, DEBOUNCE_SECONDS after the burst settles.
+        # Events only move a monotonic deadline; one thread waits for it.
+        event_type = event.event_type
+        if event_type in ("opened", "closed_no_write"):
+            # Read-only access (including the report's own reads) changes nothing
             return
-            
-        # Debounce: Check if enough time has passed since the last trigger
-        current_time = time.time()
-        if current_time - self.last_triggered > DEBOUNCE_SECONDS:
-            print(f"\n🔔 Change detected: {event.event_type} at {event.src_path}")
-            generate_folder_report(self.folder_path, self.output_filename)
-            self.last_triggered = current_time
+        dest_path = getattr(event, 'dest_path', '')
+        with self._lock:
+            pending = self._pending
+            pending[event.src_path] = event_type
+            if dest_path:
+                # A rename is recorded under its destination as well
+                pending[dest_path] = event_type
+            self._deadline = time.monotonic() + DEBOUNCE_SECONDS
+            if self._timer is None:
+                self._timer = threading.Thread(target=self._run, daemon=True)
+                self._timer.start()
+
+
+    def _run(self):
+        """Regenerates the report once the burst of events has gone quiet."""
+        while True:
+            with self._lock:
+                delay = self._deadline - time.monotonic()
+                if delay <= 0:
+                    pending, self._pending = self._pending, {}
+                    # Later events start a fresh thread while this one reports
+                    self._timer = None
+                    break
+            time.sleep(delay)
+        if not pending:
+            return
+        path, event_type = next(reversed(pending.items()))
+        more = f" (+{len(pending) - 1} more)" if len(pending) > 1 else ""
+        print(f"\n🔔 Change detected: {event_type} at {path}{more}")
+        self.regenerate()
+
+
+    def regenerate(self):
+        """Generates the report, re-reading only files that changed since the last run."""
+        with self._report_lock:
+            generate_folder_report(self.folder_path, self.output_filename, cache=self._cache)
 
 
 
@@ -149,12 +305,16 @@ if __name__ == "__main__":
     if not os.path.isdir(FOLDER_TO_WATCH):
         print(f"❌ Error: The folder '{FOLDER_TO_WATCH}' was not found.")
         print("Please create the folder or place this script in the correct parent directory.")
+    elif is_inside(OUTPUT_FILENAME, FOLDER_TO_WATCH):
+        # The report would trigger the watcher that regenerates it
+        print(f"❌ Error: '{OUTPUT_FILENAME}' must be written outside '{FOLDER_TO_WATCH}'.")
     else:
-        # Generate the initial report on startup
-        generate_folder_report(FOLDER_TO_WATCH, OUTPUT_FILENAME)
+        # Generate the initial report on startup; going through the handler
+        # seeds its file cache for the regenerations that follow
+        event_handler = ReportEventHandler(FOLDER_TO_WATCH, OUTPUT_FILENAME)
+        event_handler.regenerate()
         
         # Set up and start the watcher
-        event_handler = ReportEventHandler(FOLDER_TO_WATCH, OUTPUT_FILENAME)
         observer = Observer()
         observer.schedule(event_handler, FOLDER_TO_WATCH, recursive=True)
         
@@ -1,9 +1,25 @@
 #!/usr/bin/env python3
 import sys
+import hashlib
 import json
+import os
 import re
+import tempfile
 import xml.etree.ElementTree as ET
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_ATTR_RE = re.compile(r'(\w+)\s*:\s*("[^"]*")')
+_CUSTOM_RE = re.compile(r'^\s*([\w\s_]+?)\s*:\s*(.*)', re.MULTILINE)
+_DESC_RE = re.compile(r'^(\S+)\s*(?:\((.*?)\))?\s*(.*)$')
+
+# Bump when parsing changes so cached output from older versions is ignored
+PARSER_VERSION = 2
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'securescript', 'audit')
+
 #region: Metadata Parsing Functions (from metadata.py)
 def parse_metadata(lines):
     """
@@ -54,7 +70,7 @@ def parse_metadata(lines):
                 }
                 
                 description_text = var_elem.find('description').text.strip() if var_elem.find('description') is not None else ""
-                match = re.match(r'^(\S+)\s*(?:\((.*?)\))?\s*(.*)$', description_text)
+                match = _DESC_RE.match(description_text)
                 
                 if match:
                     var['id'] = match.group(1)
@@ -81,9 +97,7 @@ def parse_attributes(attr_string):
     Parses key-value attributes from a tag's attribute string.
     """
     attributes = {}
-    pattern = re.compile(r'(\w+)\s*:\s*(".*?")')
-    matches = pattern.findall(attr_string)
-    for key, value in matches:
+    for key, value in _ATTR_RE.findall(attr_string):
         attributes[key] = value.strip('"')
     return attributes
 
@@ -92,8 +106,7 @@ def parse_custom_item(item_content):
     Parses the key-value pairs inside a <custom_item> or <report> block.
     """
     item_dict = {}
-    pattern = re.compile(r'^\s*([\w\s_]+?)\s*:\s*(.*)', re.MULTILINE)
-    matches = pattern.findall(item_content.strip())
+    matches = _CUSTOM_RE.findall(item_content.strip())
     
     for key, value in matches:
         clean_key = key.strip()
@@ -102,7 +115,7 @@ def parse_custom_item(item_content):
         # --- THIS IS THE FIX ---
         # If the key is 'description', parse it into id, profile, and title.
         if clean_key.lower() == 'description':
-            desc_match = re.match(r'^(\S+)\s*(?:\((.*?)\))?\s*(.*)$', clean_value)
+            desc_match = _DESC_RE.match(clean_value)
             if desc_match:
                 item_dict['id'] = desc_match.group(1)
                 if desc_match.group(2): # Add profile only if it exists
@@ -117,29 +130,58 @@ def parse_custom_item(item_content):
             
     return item_dict
 
+def strip_ui_metadata(text_data):
+    """
+    Removes every '# <ui_metadata> ... </ui_metadata>' block from the text.
+    """
+    open_tag, close_tag = '<ui_metadata>', '</ui_metadata>'
+    pieces = []
+    last = 0
+    pos = text_data.find(open_tag)
+    while pos != -1:
+        # The block starts at the '#' before any whitespace ahead of the tag
+        start = pos
+        while start > last and text_data[start - 1].isspace():
+            start -= 1
+        if start > last and text_data[start - 1] == '#':
+            end = text_data.find(close_tag, pos + len(open_tag))
+            if end == -1:
+                break
+            pieces.append(text_data[last:start - 1])
+            last = end + len(close_tag)
+            pos = text_data.find(open_tag, last)
+        else:
+            pos = text_data.find(open_tag, pos + 1)
+
+    if not pieces:
+        return text_data
+    pieces.append(text_data[last:])
+    return ''.join(pieces)
+
 def parse_policy(text_data):
     """
     Parses the custom text format into a nested Python dictionary.
     """
-    text_data = re.sub(r'#\s*<ui_metadata>.*?</ui_metadata>', '', text_data, flags=re.DOTALL)
+    text_data = strip_ui_metadata(text_data)
     
     stack = [{}]
     pattern = re.compile(r'<(?:/([a-zA-Z_]+)|([a-zA-Z_]+)([^>]*))>', re.DOTALL)
-    last_index = 0
+    # Last close tag position found per block type (-1 once none are left).
+    # Searches only move forward, so the document is scanned once per type
+    # rather than once per block.
+    next_close = {'custom_item': 0, 'report': 0}
 
     for match in pattern.finditer(text_data):
-        content = text_data[last_index:match.start()].strip()
-        if content:
-            pass
-
         closing_tag, opening_tag, attrs = match.groups()
         
         if opening_tag:
             new_node = parse_attributes(attrs)
             
-            if opening_tag in ['custom_item', 'report']:
-                end_tag = f'</{opening_tag}>'
-                end_pos = text_data.find(end_tag, match.end())
+            if opening_tag in next_close:
+                end_pos = next_close[opening_tag]
+                if 0 <= end_pos < match.end():
+                    end_pos = text_data.find(f'</{opening_tag}>', match.end())
+                    next_close[opening_tag] = end_pos
                 if end_pos != -1:
                     item_content = text_data[match.end():end_pos]
                     new_node.update(parse_custom_item(item_content))
@@ -158,12 +200,63 @@ def parse_policy(text_data):
             if len(stack) > 1:
                 stack.pop()
 
-        last_index = match.end()
-
     return stack[0]
 
 #endregion
 
+#region: Output Cache
+def cache_path(input_file):
+    """
+    Returns the cache file used for an audit file, named by its absolute path.
+    """
+    digest = hashlib.sha1(os.path.abspath(input_file).encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, f'{digest}.json')
+
+def load_cached_output(input_file, key):
+    """
+    Returns the cached JSON output if it was written for the same key, else None.
+    The first line of a cache file holds the key, the rest is the output.
+    """
+    try:
+        with open(cache_path(input_file), 'r', encoding='utf-8') as f:
+            if json.loads(f.readline()) != key:
+                return None
+            return f.read()
+    except (OSError, ValueError):
+        return None
+
+def store_cached_output(input_file, key, output):
+    """
+    Atomically writes the output to the cache. Failures only skip caching.
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(key) + '\n')
+                f.write(output)
+            os.replace(tmp_path, cache_path(input_file))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+
+#endregion
+
+def to_json(data):
+    """
+    Serializes data as JSON indented by 2 spaces, using orjson when installed.
+    Trees nested deeper than orjson allows fall back to the json module.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(data, indent=2)
+
 def main():
     """
     Main function to read file, parse, and print combined JSON.
@@ -176,9 +269,11 @@ def main():
 
     try:
         with open(input_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-            f.seek(0)
-            lines = f.readlines()
+            st = os.fstat(f.fileno())
+            cache_key = [st.st_mtime_ns, st.st_size, PARSER_VERSION]
+            cached_output = load_cached_output(input_file, cache_key)
+            if cached_output is None:
+                content = f.read()
 
     except FileNotFoundError:
         print(f"Error: Input file not found at '{input_file}'", file=sys.stderr)
@@ -186,7 +281,12 @@ def main():
     except Exception as e:
         print(f"An error occurred while reading the file: {e}", file=sys.stderr)
         sys.exit(1)
+
+    if cached_output is not None:
+        print(cached_output)
+        return
         
+    lines = content.splitlines(keepends=True)
     metadata_data = parse_metadata(lines)
     policy_data = parse_policy(content)
 
@@ -195,7 +295,9 @@ def main():
         "policy": policy_data
     }
 
-    print(json.dumps(combined_output, indent=2))
+    output = to_json(combined_output)
+    store_cached_output(input_file, cache_key, output)
+    print(output)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,16 +1,17 @@
 import json
 import re
 
+_ATTR_RE = re.compile(r'(\w+)\s*:\s*("[^"]*")')
+_CUSTOM_RE = re.compile(r'^\s*([\w_]+)\s+:\s+(.*)')
+
 def parse_attributes(attr_string):
     """
     Parses key-value attributes from a tag's attribute string.
     Example: 'type:"Windows" version:"2"' -> {'type': 'Windows', 'version': '2'}
     """
     attributes = {}
-    # Regex to find key:"value" pairs
-    pattern = re.compile(r'(\w+)\s*:\s*(".*?")')
-    matches = pattern.findall(attr_string)
-    for key, value in matches:
+    # Find all key:"value" pairs
+    for key, value in _ATTR_RE.findall(attr_string):
         # Remove quotes from the value
         attributes[key] = value.strip('"')
     return attributes
@@ -20,14 +21,12 @@ def parse_custom_item(item_content):
     Parses the key-value pairs inside a <custom_item> block.
     """
     item_dict = {}
-    # Regex to find key : value lines
-    pattern = re.compile(r'^\s*([\w_]+)\s+:\s+(.*)', re.MULTILINE)
     lines = item_content.strip().split('\n')
     
     # Using a more robust way to handle multi-line values
     current_key = None
     for line in lines:
-        match = re.match(r'^\s*([\w_]+)\s+:\s+(.*)', line)
+        match = _CUSTOM_RE.match(line)
         if match:
             key, value = match.groups()
             current_key = key.strip()
@@ -1,24 +1,77 @@
+import asyncio
 import os
 import json
-import re
-import time
 import fitz  # PyMuPDF
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# 3 workers each sending one request per 15 seconds stays within 15 requests/minute
+MAX_CONCURRENT_REQUESTS = 3
+REQUEST_INTERVAL_SECONDS = 15
+
 def extract_text_from_pdf(pdf_path):
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"The file was not found at: {pdf_path}")
     
     print(f"Extracting text from the PDF: {os.path.basename(pdf_path)}...")
-    full_text = ""
     with fitz.open(pdf_path) as doc:
-        for page in doc:
-            full_text += page.get_text()
+        full_text = "".join(page.get_text() for page in doc)
     return full_text
 
-def generate_toc_from_chunks(text_chunks):
-    """Processes text chunks and combines the results."""
+def iter_chunks(text, chunk_size):
+    """Yields the text in chunk_size slices, cutting each one only when it is needed."""
+    for start in range(0, len(text), chunk_size):
+        yield text[start:start + chunk_size]
+
+def strip_json_fence(text):
+    """Returns the body of the first ```json fenced block, or the text unchanged if there is none."""
+    start = text.find("```json")
+    if start == -1:
+        return text
+    start += len("```json")
+    end = text.find("```", start)
+    if end == -1:
+        return text
+    return text[start:end].strip()
+
+async def extract_toc_from_chunk(model, i, chunk):
+    """Sends one text chunk to the model and returns its top-level ToC entries."""
+    try:
+        prompt = f"""
+        From the following text of a CIS Benchmark document, extract any Table of Contents entries.
+        Format the output as a single JSON object with a root key "recommendations". Maintain the exact structure including IDs, titles, profiles, and children arrays.
+        If this chunk is part of a larger document, only extract the items present in this text.
+
+        --- TEXT CHUNK BEGIN ---
+        {chunk}
+        --- TEXT CHUNK END ---
+        """
+        
+        response = await model.generate_content_async(prompt)
+        
+        json_string = strip_json_fence(response.text)
+
+        chunk_data = json_loads(json_string)
+        
+        if "recommendations" in chunk_data and chunk_data["recommendations"]:
+            recommendations = chunk_data["recommendations"]
+            # Only a list can be merged safely once every chunk has come back
+            if isinstance(recommendations, list):
+                return recommendations
+        return []
+
+    except Exception as e:
+        print(f"An error occurred on chunk {i+1}: {e}")
+        print("Skipping this chunk.")
+        return []
+
+async def generate_toc_from_chunks(text_chunks, chunk_count):
+    """Processes text chunks concurrently and combines the results in order."""
     full_toc = {"recommendations": []}
     
     # Initialize the model once
@@ -29,42 +82,23 @@ def generate_toc_from_chunks(text_chunks):
     genai.configure(api_key=api_key)
     model = genai.GenerativeModel('gemini-1.5-flash') # Or 'gemini-1.5-pro'
 
-    for i, chunk in enumerate(text_chunks):
-        print(f"Processing chunk {i+1} of {len(text_chunks)}...")
-        try:
-            prompt = f"""
-            From the following text of a CIS Benchmark document, extract any Table of Contents entries.
-            Format the output as a single JSON object with a root key "recommendations". Maintain the exact structure including IDs, titles, profiles, and children arrays.
-            If this chunk is part of a larger document, only extract the items present in this text.
-
-            --- TEXT CHUNK BEGIN ---
-            {chunk}
-            --- TEXT CHUNK END ---
-            """
-            
-            response = model.generate_content(prompt)
-            
-            cleaned_json_match = re.search(r'```json\s*([\s\S]*?)\s*```', response.text)
-            if cleaned_json_match:
-                json_string = cleaned_json_match.group(1)
-            else:
-                json_string = response.text
+    results = [None] * chunk_count
+    numbered_chunks = enumerate(text_chunks)
 
-            chunk_data = json.loads(json_string)
-            
-            if "recommendations" in chunk_data and chunk_data["recommendations"]:
-                # A more robust solution would deeply merge the JSON trees.
-                # For simplicity here, we are appending top-level items.
-                full_toc["recommendations"].extend(chunk_data["recommendations"])
-
-            # Wait to avoid hitting the rate limit again
-            print("Waiting for 15 seconds before the next request...")
-            time.sleep(15)
-
-        except Exception as e:
-            print(f"An error occurred on chunk {i+1}: {e}")
-            print("Skipping this chunk.")
-            time.sleep(15) # Wait even if there's an error
+    async def worker():
+        # Workers share one iterator, so chunks are still sliced only when taken
+        for i, chunk in numbered_chunks:
+            print(f"Processing chunk {i+1} of {chunk_count}...")
+            results[i] = await extract_toc_from_chunk(model, i, chunk)
+            # Each worker waits between its own requests to stay under the rate limit
+            await asyncio.sleep(REQUEST_INTERVAL_SECONDS)
+
+    await asyncio.gather(*(worker() for _ in range(MAX_CONCURRENT_REQUESTS)))
+
+    for recommendations in results:
+        # A more robust solution would deeply merge the JSON trees.
+        # For simplicity here, we are appending top-level items.
+        full_toc["recommendations"].extend(recommendations)
             
     return full_toc
 
@@ -77,9 +111,9 @@ if __name__ == "__main__":
         if pdf_text:
             # Split the text into chunks of 15,000 characters
             chunk_size = 15000
-            chunks = [pdf_text[i:i + chunk_size] for i in range(0, len(pdf_text), chunk_size)]
+            chunk_count = -(-len(pdf_text) // chunk_size)
             
-            toc_data = generate_toc_from_chunks(chunks)
+            toc_data = asyncio.run(generate_toc_from_chunks(iter_chunks(pdf_text, chunk_size), chunk_count))
 
             if toc_data and toc_data["recommendations"]:
                 print("\n✅ Successfully extracted the complete Table of Contents:")
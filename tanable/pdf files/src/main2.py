@@ -1,11 +1,15 @@
 import os
 import json
-import re
 import time
 import fitz  # PyMuPDF
 from openai import OpenAI
 from dotenv import load_dotenv
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 def extract_text_from_pdf(pdf_path):
     """
     Opens a PDF file and extracts all text from its pages.
@@ -14,12 +18,23 @@ def extract_text_from_pdf(pdf_path):
         raise FileNotFoundError(f"The file was not found at: {pdf_path}")
     
     print(f"Extracting text from the PDF: {os.path.basename(pdf_path)}...")
-    full_text = ""
     with fitz.open(pdf_path) as doc:
-        for page in doc:
-            full_text += page.get_text()
+        full_text = "".join(page.get_text() for page in doc)
     return full_text
 
+def strip_json_fence(text):
+    """
+    Returns the body of the first ```json fenced block, or the text unchanged if there is none.
+    """
+    start = text.find("```json")
+    if start == -1:
+        return text
+    start += len("```json")
+    end = text.find("```", start)
+    if end == -1:
+        return text
+    return text[start:end].strip()
+
 def generate_toc_with_perplexity(pdf_text_content):
     """
     Sends the full PDF text to the Perplexity API to extract the Table of Contents.
@@ -66,11 +81,9 @@ def generate_toc_with_perplexity(pdf_text_content):
         json_string = response.choices[0].message.content
         
         # Clean the response to ensure it's just the JSON
-        cleaned_json_match = re.search(r'```json\s*([\s\S]*?)\s*```', json_string)
-        if cleaned_json_match:
-            json_string = cleaned_json_match.group(1)
+        json_string = strip_json_fence(json_string)
             
-        return json.loads(json_string)
+        return json_loads(json_string)
 
     except Exception as e:
         print(f"An error occurred: {e}")
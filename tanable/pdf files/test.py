@@ -7,25 +7,107 @@ outputs it as a structured JSON file with parsed recommendation details.
 """
 
 import fitz  # PyMuPDF
+import hashlib
+import io
 import json
+import os
 import sys
 import re
+import tempfile
 import argparse
 
-def transform_node(node):
+# Title layout: "<id> (<profile>) <title> (Automated|Manual)", every part optional.
+# The profile group accepts any text within the parentheses, not just L1/L2.
+_TITLE_RE = re.compile(
+    r'^\s*([\d\.]*)\s*(?:\((.*?)\))?\s*(.*?)\s*(?:\((Automated|Manual)\))?\s*$'
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Raw ToC lists from earlier runs, keyed by PDF path, mtime and size
+TOC_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "cis_toc")
+
+def write_json(obj, stream):
+    """
+    Writes obj as indented UTF-8 JSON to a binary stream without building the
+    whole document as a str first. Uses orjson when it is installed.
     """
-    Recursively transforms a node from the PyMuPDF ToC structure to the desired
-    custom JSON format. It parses the title to extract ID, profile, and assessment.
+    if orjson is not None:
+        stream.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+        return
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8")
+    json.dump(obj, text_stream, indent=2, ensure_ascii=False)
+    text_stream.flush()
+    text_stream.detach()
+
+def toc_cache_path(pdf_path):
+    """
+    Returns the cache file for the PDF's current version, or None if it can't be stat'ed.
+    """
+    try:
+        st = os.stat(pdf_path)
+    except OSError:
+        return None
+    key = f"{os.path.abspath(pdf_path)}:{st.st_mtime_ns}:{st.st_size}"
+    return os.path.join(TOC_CACHE_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+def load_cached_toc(cache_path):
+    """
+    Returns the cached raw ToC list, or None if there is no usable cache entry.
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            return orjson.loads(f.read()) if orjson is not None else json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def store_cached_toc(cache_path, toc):
+    """
+    Atomically writes the raw ToC list to the cache. Failures only skip caching.
+    """
+    try:
+        os.makedirs(TOC_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=TOC_CACHE_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(toc) if orjson is not None else json.dumps(toc).encode("utf-8"))
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+
+class TocNode:
+    """
+    A raw PyMuPDF ToC entry with its nested entries. Uses __slots__ so large ToCs
+    don't carry a dict per entry.
+    """
+    __slots__ = ("title", "subsections")
+
+    def __init__(self, title):
+        self.title = title
+        self.subsections = []
+
+def parse_title(node):
+    """
+    Builds the custom JSON node for a single PyMuPDF ToC node (without its
+    children). It parses the title to extract ID, profile, and assessment.
     """
     new_node = {}
-    original_title = node.get("title", "").strip()
+    original_title = node.title.strip()
 
-    # UPDATED REGEX: Changed (L1|L2) to (.*?) to capture any text within
-    # the parentheses for the profile, making it flexible.
-    pattern = re.compile(
-        r'^\s*([\d\.]*)\s*(?:\((.*?)\))?\s*(.*?)\s*(?:\((Automated|Manual)\))?\s*$'
-    )
-    match = pattern.match(original_title)
+    # Without a leading ID or any parentheses there is nothing to extract, so
+    # plain headings like "Overview" skip the regex
+    first_char = original_title[:1]
+    if "(" not in original_title and first_char != "." and not first_char.isdigit():
+        new_node["title"] = original_title
+        return new_node
+
+    match = _TITLE_RE.match(original_title)
 
     if match:
         # Unpacking remains the same
@@ -37,20 +119,36 @@ def transform_node(node):
         
         new_node["title"] = title_text.strip()
         
+        # Profiles and assessments repeat across most nodes ("L1", "Automated", ...);
+        # interning keeps one shared copy of each instead of one per node
         if profile:
-            new_node["profile"] = profile.strip() # Added strip() for cleanliness
+            new_node["profile"] = sys.intern(profile.strip()) # Added strip() for cleanliness
         if assessment:
-            new_node["assessment"] = assessment
+            new_node["assessment"] = sys.intern(assessment)
     else:
         # Fallback for titles that don't match the pattern
         new_node["title"] = original_title
 
-    # Recursively transform children if they exist
-    if "subsections" in node:
-        new_node["children"] = [transform_node(child) for child in node["subsections"]]
-
     return new_node
 
+def transform_node(node):
+    """
+    Transforms a node and its subsections from the PyMuPDF ToC structure to the
+    desired custom JSON format. Walks the tree with an explicit stack, so deeply
+    nested ToCs cannot hit the recursion limit.
+    """
+    root = parse_title(node)
+    stack = [(node, root)]
+    while stack:
+        raw_node, new_node = stack.pop()
+        # Transform children if they exist
+        if raw_node.subsections:
+            children = [parse_title(child) for child in raw_node.subsections]
+            new_node["children"] = children
+            stack.extend(zip(raw_node.subsections, children))
+
+    return root
+
 
 def generate_raw_toc(toc_list):
     """
@@ -60,31 +158,32 @@ def generate_raw_toc(toc_list):
         return []
 
     result = []
-    parents = []
+    # Open ancestors live in a preallocated slot array; `depth` is how many are
+    # in use, so truncating the chain is one assignment instead of pops
+    parents = [None] * max(1, max(item[0] for item in toc_list))
+    depth = 0
 
     for item in toc_list:
         level, title, _ = item  # Page number is ignored
-        node = {"title": title}
+        node = TocNode(title)
 
         if level == 1:
             result.append(node)
-            parents = [node]
+            parents[0] = node
+            depth = 1
         else:
-            while len(parents) >= level:
-                parents.pop()
+            if depth >= level:
+                depth = level - 1 if level > 1 else 0
 
-            if not parents:
+            if not depth:
                 result.append(node)
-                parents.append(node)
+                parents[0] = node
+                depth = 1
                 continue
-                
-            parent_node = parents[-1]
 
-            if "subsections" not in parent_node:
-                parent_node["subsections"] = []
-            
-            parent_node["subsections"].append(node)
-            parents.append(node)
+            parents[depth - 1].subsections.append(node)
+            parents[depth] = node
+            depth += 1
 
     return result
 
@@ -100,18 +199,24 @@ def main():
     parser.add_argument("-o", "--output", help="The path to the output JSON file. If not provided, prints to console.")
     args = parser.parse_args()
 
-    try:
-        doc = fitz.open(args.input_pdf)
-    except Exception as e:
-        print(f"Error opening PDF '{args.input_pdf}': {e}", file=sys.stderr)
-        sys.exit(1)
+    # Re-runs on an unchanged PDF skip opening it altogether
+    cache_path = toc_cache_path(args.input_pdf)
+    toc = load_cached_toc(cache_path) if cache_path else None
+    if toc is None:
+        try:
+            doc = fitz.open(args.input_pdf)
+        except Exception as e:
+            print(f"Error opening PDF '{args.input_pdf}': {e}", file=sys.stderr)
+            sys.exit(1)
 
-    toc = doc.get_toc()
-    doc.close()
+        toc = doc.get_toc()
+        doc.close()
+        if cache_path:
+            store_cached_toc(cache_path, toc)
 
     if not toc:
         print(f"Warning: Document '{args.input_pdf}' has no ToC.", file=sys.stderr)
-        json_output = json.dumps({"recommendations": []})
+        final_json_obj = {"recommendations": []}
     else:
         # 1. Generate the basic nested structure
         raw_toc = generate_raw_toc(toc)
@@ -119,33 +224,33 @@ def main():
         # 2. Find the primary "Recommendations" section
         recommendations_root = None
         for item in raw_toc:
-            if "recommendations" in item.get("title", "").lower():
+            if "recommendations" in item.title.lower():
                 recommendations_root = item
                 break
         
         # 3. Transform the nodes into the final format
-        if recommendations_root and "subsections" in recommendations_root:
-            transformed_children = [transform_node(child) for child in recommendations_root["subsections"]]
+        if recommendations_root and recommendations_root.subsections:
+            transformed_children = [transform_node(child) for child in recommendations_root.subsections]
             final_json_obj = {"recommendations": transformed_children}
         else:
             # Fallback: if "Recommendations" not found, transform the whole ToC
             print("Warning: 'Recommendations' section not found. Transforming entire ToC.", file=sys.stderr)
             transformed_children = [transform_node(child) for child in raw_toc]
             final_json_obj = {"recommendations": transformed_children}
-            
-        json_output = json.dumps(final_json_obj, indent=2)
 
     # 4. Output the result
     if args.output:
         try:
-            with open(args.output, 'w', encoding='utf-8') as f:
-                f.write(json_output)
+            with open(args.output, 'wb') as f:
+                write_json(final_json_obj, f)
             print(f"Successfully created ToC file at '{args.output}'")
         except Exception as e:
             print(f"Error writing to output file '{args.output}': {e}", file=sys.stderr)
             sys.exit(1)
     else:
-        print(json_output)
+        sys.stdout.flush()
+        write_json(final_json_obj, sys.stdout.buffer)
+        sys.stdout.buffer.write(b"\n")
 
 if __name__ == "__main__":
     main()
@@ -24,61 +24,103 @@ Example
 python toc_extract.py CIS_Google_Android_Benchmark_v1.5.0.pdf 12
 """
 
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 
 import pdfplumber
 
 # Regex patterns
 TOC_HEADER_RE = re.compile(r"\btable of contents\b", re.I)
-DOTS_PAGE_RE = re.compile(r"^(?P<title>.+?)\s+\.{2,}\s+\d+\s*$")
-NUM_PREFIX_RE = re.compile(r"^(?P<dashes>-*)(?P<num>\d+(?:\.\d+)*)\s+(?P<rest>.+)$")
-HEADER_FOOTER_RE = re.compile(r"^(table of contents|page\s+\d+)", re.I)
+DOTS_PAGE_RE = re.compile(r"^(?P<title>.+?)\s+\.{2,}\s+\d+\s*$", re.M)
+# One pass per line: "Title ..... page" (title), else optional dashes plus a
+# numbering prefix (num, rest); the first alternative wins as before
+TOC_LINE_RE = re.compile(
+    r"^(?:(?P<title>.+?)\s+\.{2,}\s+\d+\s*"
+    r"|-*(?P<num>\d+(?:\.\d+)*)\s+(?P<rest>.+))$"
+)
+LEADING_NUM_RE = re.compile(r"(\d+(?:\.\d+)*)(?:\s|$)")
 
+# "-----" per hierarchy level below the top, built once for common depths
+LEVEL_INDENTS = tuple("-----" * depth for depth in range(8))
 
-def _find_toc_pages(pdf: pdfplumber.PDF, first_n: int = 10) -> List[int]:
+
+def _find_toc_pages(page_texts: List[str]) -> List[int]:
     """
     Return list of 0-based page indexes that look like TOC pages, based on header
     presence or typical TOC line pattern.
     """
+    # Cheap screen over all pages first: with neither a header nor a dotted
+    # leader anywhere there is no TOC page to look for
+    joined = "\n\f".join(page_texts)
+    if ".." not in joined and "table of contents" not in joined.casefold():
+        return []
+
     pages = []
-    for idx, page in enumerate(pdf.pages[:first_n]):
-        txt = page.extract_text() or ""
+    for idx, txt in enumerate(page_texts):
         if TOC_HEADER_RE.search(txt):
             pages.append(idx)
             continue
-        if DOTS_PAGE_RE.search(txt, re.M):
+        # A dotted leader needs "..", so skip the regex on pages without one
+        if ".." in txt and DOTS_PAGE_RE.search(txt):
             pages.append(idx)
-    return sorted(set(pages))
+    return pages
+
+
+def _extract_page_texts(pdf_path: Path, start: int, stop: int) -> List[str]:
+    """
+    Extract the text of pages [start, stop), skipping any past the end of the
+    document. Runs in a worker process, so it opens its own handle on the PDF;
+    only the requested pages are built, not the whole page list.
+    """
+    with pdfplumber.open(pdf_path, pages=range(start + 1, stop + 1)) as pdf:
+        return [page.extract_text(x_tolerance=1, y_tolerance=3) or ""
+                for page in pdf.pages]
 
 
-def _clean_lines(raw_text: str) -> List[str]:
+def _is_header_footer(line: str) -> bool:
+    """
+    True for "Table of Contents" headers and "Page N" footers (case-insensitive),
+    checked with plain string tests instead of a regex per line.
+    """
+    head = line[:17].lower()
+    if head.startswith("table of contents"):
+        return True
+    if head.startswith("page"):
+        return line[4:].lstrip()[:1].isdecimal() and line[4:5].isspace()
+    return False
+
+
+def _clean_lines(raw_text: str) -> List[Tuple[str, Optional[re.Match]]]:
     """
     Cleans and attempts to join wrapped TOC lines using a basic heuristic:
     If a line doesn't match TOC patterns and the next line starts lowercase,
-    join them.
+    join them. Each line comes back with its TOC_LINE_RE match (or None).
     """
     lines = [line.rstrip() for line in raw_text.splitlines()]
     # Remove blank lines and headers/footers
-    lines = [l for l in lines if l and not HEADER_FOOTER_RE.match(l)]
+    lines = [l for l in lines if l and not _is_header_footer(l)]
     
     glued_lines = []
-    skip_next = False
-    for i, line in enumerate(lines):
-        if skip_next:
-            skip_next = False
-            continue
-        if i + 1 < len(lines):
+    i = 0
+    n = len(lines)
+    while i < n:
+        line = lines[i]
+        m_line = TOC_LINE_RE.match(line)
+        if i + 1 < n:
             next_line = lines[i + 1]
-            # Join if current line doesn't look like TOC entry, next line starts lowercase
-            if not DOTS_PAGE_RE.match(line) and not NUM_PREFIX_RE.match(line):
-                if next_line and next_line[0].islower():
-                    glued_lines.append(line + " " + next_line)
-                    skip_next = True
-                    continue
-        glued_lines.append(line)
+            # Join if current line doesn't look like TOC entry, next line starts
+            # lowercase (lines are never empty here)
+            if m_line is None and next_line[0].islower():
+                glued = line + " " + next_line
+                glued_lines.append((glued, TOC_LINE_RE.match(glued)))
+                i += 2
+                continue
+        glued_lines.append((line, m_line))
+        i += 1
     return glued_lines
 
 
@@ -96,44 +138,57 @@ def extract_toc(pdf_path: str, scan_pages: int = 10) -> List[str]:
 
     extracted_lines = []
 
-    with pdfplumber.open(pdf_path) as pdf:
-        toc_pages = _find_toc_pages(pdf, first_n=scan_pages)
-        if not toc_pages:
-            raise RuntimeError("No TOC pages found automatically. "
-                               "Try increasing pages_to_scan or specify pages manually.")
-
-        for page_idx in toc_pages:
-            page_text = pdf.pages[page_idx].extract_text(x_tolerance=1, y_tolerance=3) or ""
-            cleaned_lines = _clean_lines(page_text)
-
-            for line in cleaned_lines:
-                title = ""
-                level = 1
-
-                # Try match “Title …… page” style
-                m_dots = DOTS_PAGE_RE.match(line)
-                if m_dots:
-                    title = m_dots.group("title").strip()
-                else:
-                    # Try match optional dashes + numbering prefix style
-                    m_num = NUM_PREFIX_RE.match(line.lstrip("-"))
-                    if m_num:
-                        num = m_num.group("num")
-                        rest = m_num.group("rest").strip()
-                        title = f"{num} {rest}"
-                    else:
-                        # Otherwise treat as plain heading
-                        title = line.strip()
-
-                # Determine level from numeric prefix if present
-                first_token = title.split()[0]
-                if re.fullmatch(r"\d+(?:\.\d+)*", first_token):
-                    level = first_token.count(".") + 1
-                else:
-                    level = 1
-
+    # Extract each scanned page once; detection and parsing share the text.
+    # pdfminer layout analysis is pure Python, so pages are split into
+    # contiguous ranges across processes rather than threads. The PDF is
+    # not opened here just to count pages: ranges past its end come back empty.
+    workers = min(os.cpu_count() or 1, scan_pages)
+    if workers <= 1:
+        page_texts = _extract_page_texts(pdf_path, 0, scan_pages)
+    else:
+        step = -(-scan_pages // workers)
+        starts = range(0, scan_pages, step)
+        with ProcessPoolExecutor(max_workers=len(starts)) as executor:
+            batches = executor.map(_extract_page_texts, [pdf_path] * len(starts), starts,
+                                   [min(start + step, scan_pages) for start in starts])
+            page_texts = [text for batch in batches for text in batch]
+
+    toc_pages = _find_toc_pages(page_texts)
+    if not toc_pages:
+        raise RuntimeError("No TOC pages found automatically. "
+                           "Try increasing pages_to_scan or specify pages manually.")
+
+    for page_idx in toc_pages:
+        cleaned_lines = _clean_lines(page_texts[page_idx])
+
+        for line, m_line in cleaned_lines:
+            title = ""
+            numeric_prefix = None
+
+            if m_line is None:
+                # Otherwise treat as plain heading
+                title = line.strip()
+            elif m_line.group("title") is not None:
+                # Matched “Title …… page” style
+                title = m_line.group("title").strip()
+            else:
+                # Matched optional dashes + numbering prefix style
+                numeric_prefix = m_line.group("num")
+                rest = m_line.group("rest").strip()
+                title = f"{numeric_prefix} {rest}"
+
+            # Determine level from numeric prefix if present
+            if numeric_prefix is None:
+                m_lead = LEADING_NUM_RE.match(title)
+                if m_lead:
+                    numeric_prefix = m_lead.group(1)
+            level = numeric_prefix.count(".") + 1 if numeric_prefix else 1
+
+            if level <= len(LEVEL_INDENTS):
+                indent = LEVEL_INDENTS[level - 1]
+            else:
                 indent = "-----" * (level - 1)
-                extracted_lines.append(f"{indent}{title}")
+            extracted_lines.append(indent + title)
 
     return extracted_lines
 
@@ -148,8 +203,8 @@ def main():
 
     try:
         toc_lines = extract_toc(pdf_file, scan_pages=pages_to_scan)
-        for line in toc_lines:
-            print(line)
+        if toc_lines:
+            print("\n".join(toc_lines))
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(2)